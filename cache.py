@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import threading
+import time
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from config import settings
+
+# -------------------------------
+# Response Cache
+# -------------------------------
+CACHE_FILE = settings.cache_file
+CACHE_TTL = settings.cache_ttl
+CACHE_MAX_ENTRIES = settings.cache_max_entries
+
+_lock = threading.Lock()
+# Serializes disk writes so readers never wait on I/O behind _lock
+_write_lock = threading.Lock()
+
+
+def _load():
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        # A missing or corrupt file just means starting with an empty cache
+        return {}
+    if not isinstance(raw, dict):
+        return {}
+    entries = {}
+    for key, entry in raw.items():
+        if isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], str) and isinstance(entry[1], (int, float)):
+            entries[key] = (entry[0], float(entry[1]))
+    return entries
+
+
+_entries = _load()
+
+
+def make_key(model: str, prompt_tag: str, mode: str, text: str):
+    # Collapse whitespace and case so re-pasted lectures hit the same entry;
+    # model and prompt_tag retire old entries when the model or prompts change
+    normalized = re.sub(r"\s+", " ", text).strip().lower()
+    return sha256(f"{model}\n{prompt_tag}\n{mode}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        result, created = entry
+        if time.time() - created > CACHE_TTL:
+            del _entries[key]
+            return None
+        return result
+
+
+def _save():
+    with _write_lock:
+        with _lock:
+            snapshot = dict(_entries)
+        cache_dir = os.path.dirname(os.path.abspath(CACHE_FILE))
+        try:
+            tmp = NamedTemporaryFile("w", encoding="utf-8", dir=cache_dir, suffix=".tmp", delete=False)
+        except OSError:
+            return
+        # Write a sibling temp file and swap it in so a crash never leaves a truncated cache
+        try:
+            with tmp:
+                json.dump(snapshot, tmp, ensure_ascii=False)
+            os.replace(tmp.name, CACHE_FILE)
+        except OSError:
+            try:
+                os.unlink(tmp.name)
+            except OSError:
+                pass
+
+
+def put(key: str, result: str):
+    with _lock:
+        now = time.time()
+        expired = [k for k, (_, created) in _entries.items() if now - created > CACHE_TTL]
+        for k in expired:
+            del _entries[k]
+        _entries[key] = (result, now)
+        # Evict the oldest entries so the file (rewritten on every put) stays bounded
+        overflow = len(_entries) - CACHE_MAX_ENTRIES
+        if overflow > 0:
+            oldest = sorted(_entries, key=lambda k: _entries[k][1])[:overflow]
+            for k in oldest:
+                del _entries[k]
+    _save()
@@ -0,0 +1,32 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+# -------------------------------
+# Settings
+# -------------------------------
+@dataclass(frozen=True)
+class Settings:
+    openrouter_api_key: str
+    cache_file: str
+    cache_ttl: int
+    cache_max_entries: int
+    concurrency_limit: int
+
+@lru_cache(maxsize=None)
+def get_settings():
+    # Read .env once per process; later imports reuse the same Settings
+    load_dotenv()
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OpenRouter API key not found. Set it in .env")
+    return Settings(
+        openrouter_api_key=api_key,
+        cache_file=os.getenv("CACHE_FILE", "cache.json"),
+        cache_ttl=int(os.getenv("CACHE_TTL", str(7 * 24 * 3600))),
+        cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "500")),
+        concurrency_limit=int(os.getenv("CONCURRENCY_LIMIT", "4")),
+    )
+
+settings = get_settings()
@@ -0,0 +1,371 @@
+import requests
+from requests.adapters import HTTPAdapter
+import os
+import json
+import multiprocessing
+import threading
+import time
+from hashlib import sha256
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import tiktoken
+import fitz  # PyMuPDF
+from fpdf import FPDF
+import docx
+from tempfile import NamedTemporaryFile
+from config import settings
+import cache
+import pdf_pages
+
+# -------------------------------
+# OpenRouter Settings
+# -------------------------------
+API_KEY = settings.openrouter_api_key
+API_URL = "https://openrouter.ai/api/v1/chat/completions"
+MODEL = "gpt-3.5-turbo"
+
+# Shared session so OpenRouter calls reuse pooled keep-alive connections
+session = requests.Session()
+session.headers.update({"Authorization": f"Bearer {API_KEY}"})
+adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+session.mount("https://", adapter)
+
+# -------------------------------
+# Call OpenRouter API
+# -------------------------------
+# Caps in-flight map-step calls across all users so parallel windows don't trip rate limits
+MAX_CONCURRENT_CALLS = 8
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_call_slots = threading.BoundedSemaphore(MAX_CONCURRENT_CALLS)
+
+def _retry_delay(response, attempt: int):
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(int(retry_after), 30)
+    return 2 ** attempt
+
+def call_openrouter(prompt: str):
+    data = {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 2000
+    }
+    for attempt in range(MAX_RETRIES + 1):
+        with _call_slots:
+            response = session.post(API_URL, json=data, timeout=60)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        # Back off outside the semaphore so waiting calls don't hold a slot
+        time.sleep(_retry_delay(response, attempt))
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+def stream_openrouter(prompt: str):
+    data = {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 2000,
+        "stream": True
+    }
+    with session.post(API_URL, json=data, timeout=60, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        for line in response.iter_lines(decode_unicode=True):
+            # Skip keep-alive comments and blank separators between events
+            if not line or not line.startswith("data: "):
+                continue
+            payload = line[len("data: "):]
+            if payload == "[DONE]":
+                break
+            chunk = json.loads(payload)
+            if "error" in chunk:
+                raise RuntimeError(f"OpenRouter stream failed: {chunk['error'].get('message', chunk['error'])}")
+            # Trailing usage chunks carry no choices
+            for choice in chunk.get("choices") or []:
+                content = choice.get("delta", {}).get("content")
+                finish_reason = choice.get("finish_reason")
+                if content or finish_reason:
+                    # finish_reason stays None until the final chunk ("stop", "length", ...)
+                    yield content or "", finish_reason
+
+# -------------------------------
+# Generate Study Notes
+# -------------------------------
+PROMPT_TEMPLATES = {
+    "Bullet Points": "Summarize the lecture into concise bullet points:\n\n{text}",
+    "Flashcards": "Convert the lecture into question-answer flashcards:\n\n{text}\nFormat: Q: ... A: ...",
+    "MCQs": """
+Generate 5 multiple-choice questions from the lecture.
+Each question should have 4 options labeled A-D.
+Highlight the correct answer in **bold**.
+Randomize the order of questions and options.
+Lecture: {text}
+""",
+}
+
+# Bump when the prompt pipeline (condensing, merging) changes so cached notes are regenerated
+PIPELINE_VERSION = "2"
+
+# gpt-3.5-turbo has a 16k context; leave room for the template and the 2000-token reply
+MAX_INPUT_TOKENS = 13000
+WINDOW_TOKENS = 10000
+MAX_MAP_WORKERS = 8
+MAP_PROMPT = "Summarize this part of a lecture, keeping every key fact, definition, and example:\n\n{text}"
+
+# Fallback when the tokenizer cannot be loaded (e.g. no access to its download host):
+# ASCII averages ~4 characters per token, while CJK and other scripts are ~1 token per character
+CHARS_PER_TOKEN = 4
+ENCODING_RETRY_SECONDS = 300
+
+_encoding = None
+_encoding_retry_at = 0.0
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    global _encoding, _encoding_retry_at
+    with _encoding_lock:
+        if _encoding is None and time.monotonic() >= _encoding_retry_at:
+            try:
+                _encoding = tiktoken.encoding_for_model(MODEL)
+            except Exception:
+                # Don't pin the failure for the process lifetime; try the download again later
+                _encoding_retry_at = time.monotonic() + ENCODING_RETRY_SECONDS
+        return _encoding
+
+def _estimate_char_tokens(char: str):
+    return 1 / CHARS_PER_TOKEN if char.isascii() else 1
+
+def _split_windows(text: str):
+    encoding = _get_encoding()
+    if encoding is None:
+        windows, start, budget = [], 0, 0.0
+        for i, char in enumerate(text):
+            budget += _estimate_char_tokens(char)
+            if budget >= WINDOW_TOKENS:
+                windows.append(text[start:i + 1])
+                start, budget = i + 1, 0.0
+        if start < len(text):
+            windows.append(text[start:])
+        return windows
+    tokens = encoding.encode(text)
+    return [encoding.decode(tokens[i:i + WINDOW_TOKENS]) for i in range(0, len(tokens), WINDOW_TOKENS)]
+
+def count_tokens(text: str):
+    encoding = _get_encoding()
+    if encoding is None:
+        ascii_chars = sum(1 for char in text if char.isascii())
+        return ascii_chars // CHARS_PER_TOKEN + (len(text) - ascii_chars) + 1
+    return len(encoding.encode(text))
+
+def condense_text(text: str):
+    if count_tokens(text) <= MAX_INPUT_TOKENS:
+        return text
+    # Too long for one prompt: summarize fixed windows in parallel, then recurse on the joined summaries
+    windows = _split_windows(text)
+    with ThreadPoolExecutor(max_workers=min(len(windows), MAX_MAP_WORKERS)) as pool:
+        partials = list(pool.map(lambda window: call_openrouter(MAP_PROMPT.format(text=window)), windows))
+    return condense_text("\n\n".join(partials))
+
+def summarize_source(text: str):
+    if count_tokens(text) > MAX_INPUT_TOKENS:
+        # condense_text already returns merged window summaries; don't summarize them again
+        return condense_text(text)
+    return call_openrouter(MAP_PROMPT.format(text=text))
+
+def condense_sources(sources):
+    text = "\n\n".join(sources)
+    if len(sources) == 1 or count_tokens(text) <= MAX_INPUT_TOKENS:
+        return condense_text(text)
+    # Too long together: summarize each document on its own in parallel; the mode prompt merges the partials
+    with ThreadPoolExecutor(max_workers=min(len(sources), MAX_MAP_WORKERS)) as pool:
+        partials = list(pool.map(summarize_source, sources))
+    return condense_text("\n\n".join(partials))
+
+def generate_study_notes(sources, mode: str):
+    template = PROMPT_TEMPLATES.get(mode)
+    if template is None:
+        yield "Invalid mode selected."
+        return
+
+    prompt_tag = sha256(f"{PIPELINE_VERSION}\n{template}\n{MAP_PROMPT}".encode("utf-8")).hexdigest()
+    key = cache.make_key(MODEL, prompt_tag, mode, "\n\n".join(sources))
+    cached = cache.get(key)
+    if cached:
+        yield cached
+        return
+
+    prompt = template.format(text=condense_sources(sources))
+
+    # Yield the growing note so the UI shows tokens as they arrive
+    result = ""
+    finish_reason = None
+    for content, reason in stream_openrouter(prompt):
+        finish_reason = reason or finish_reason
+        if content:
+            result += content
+            yield result
+    # Truncated or interrupted streams are shown but never cached
+    if result and finish_reason == "stop":
+        cache.put(key, result)
+
+# -------------------------------
+# Extract text from PDFs
+# -------------------------------
+# Workers cost a cold start (they re-import the app's main module), so only
+# documents far beyond a typical lecture deck are split across processes
+PARALLEL_PAGE_THRESHOLD = 150
+PAGES_PER_BLOCK = 25
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawn, not fork: the pool is created from a Gradio worker thread
+            _process_pool = ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, 4),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _process_pool
+
+def _upload_path(file):
+    # Gradio hands uploads over as temp-file paths (or wrappers with .name);
+    # opening by path lets PyMuPDF read pages on demand instead of buffering bytes
+    return file if isinstance(file, str) else file.name
+
+def _reset_process_pool(pool):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _extract_in_pool(path, page_count):
+    pool = _get_process_pool()
+    try:
+        futures = {
+            pool.submit(pdf_pages.extract_pages, path, start, min(start + PAGES_PER_BLOCK, page_count)): start
+            for start in range(0, page_count, PAGES_PER_BLOCK)
+        }
+        blocks = {futures[future]: future.result() for future in as_completed(futures)}
+    except BrokenProcessPool:
+        # A worker died (e.g. MuPDF crashed on this file); start a fresh pool next time
+        _reset_process_pool(pool)
+        return pdf_pages.extract_pages(path, 0, page_count)
+    return "".join(blocks[start] for start in sorted(blocks))
+
+def extract_text_from_pdfs(files):
+    texts = []
+    for file in files:
+        path = _upload_path(file)
+        with fitz.open(path) as doc:
+            page_count = doc.page_count
+            if page_count <= PARALLEL_PAGE_THRESHOLD:
+                texts.append(pdf_pages.read_pages(doc, 0, page_count))
+                continue
+        texts.append(_extract_in_pool(path, page_count))
+    return texts
+
+# -------------------------------
+# Create PDF
+# -------------------------------
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+def create_pdf(text: str):
+    pdf = FPDF()
+    # DejaVu covers far more of Unicode than the Latin-1 core fonts
+    pdf.add_font("DejaVu", "", os.path.join(FONT_DIR, "DejaVuSans.ttf"))
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("DejaVu", size=12)
+    # One layout pass over the whole note; no markdown so "__" and "--" stay literal
+    pdf.multi_cell(0, 8, text)
+    tmp_file = NamedTemporaryFile(delete=False, suffix=".pdf")
+    pdf.output(tmp_file.name)
+    return tmp_file.name
+
+# -------------------------------
+# Create DOCX
+# -------------------------------
+def create_docx(text: str):
+    doc = docx.Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    tmp_file = NamedTemporaryFile(delete=False, suffix=".docx")
+    doc.save(tmp_file.name)
+    return tmp_file.name
+
+# -------------------------------
+# On-demand Exports
+# -------------------------------
+EXPORT_TTL = 3600
+EXPORT_WRITERS = {"pdf": create_pdf, "docx": create_docx}
+
+_exports = {}
+_exports_lock = threading.Lock()
+
+def _cleanup_exports():
+    cutoff = time.monotonic() - EXPORT_TTL
+    for key, (path, created) in list(_exports.items()):
+        if created < cutoff:
+            del _exports[key]
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+def export_notes(text: str, kind: str):
+    if not text or not text.strip():
+        return None
+    key = (kind, sha256(text.encode("utf-8")).hexdigest())
+    with _exports_lock:
+        _cleanup_exports()
+        entry = _exports.get(key)
+        if entry is not None:
+            return entry[0]
+    path = EXPORT_WRITERS[kind](text)
+    with _exports_lock:
+        entry = _exports.get(key)
+        if entry is None:
+            _exports[key] = (path, time.monotonic())
+            return path
+    # A concurrent click built the same file first; keep theirs and drop ours
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    return entry[0]
+
+def export_pdf(text):
+    return export_notes(text, "pdf")
+
+def export_docx(text):
+    return export_notes(text, "docx")
+
+# -------------------------------
+# Main Function
+# -------------------------------
+def summarize(lecture_text, mode, pdfs):
+    pasted = lecture_text.strip() if lecture_text else ""
+
+    pdf_texts = []
+    if pdfs and len(pdfs) > 0:
+        pdf_texts = [t for t in extract_text_from_pdfs(pdfs) if t.strip()]
+
+    if not pasted and not pdf_texts:
+        yield "Error: Please provide lecture text or upload at least one PDF.", None, None
+        return
+    # Several PDFs stay apart for per-document summaries, with pasted text folded into the first;
+    # otherwise everything is one lecture
+    if len(pdf_texts) > 1:
+        sources = pdf_texts
+        if pasted:
+            sources[0] = f"{pasted}\n\n{sources[0]}"
+    else:
+        sources = ["\n\n".join(t for t in [pasted, *pdf_texts] if t)]
+
+    # Exports are built only when the user asks for them
+    for partial in generate_study_notes(sources, mode):
+        yield partial, None, None
@@ -0,0 +1,16 @@
+import fitz  # PyMuPDF
+
+# -------------------------------
+# Page Text Extraction
+# -------------------------------
+# Kept free of app imports so process-pool workers only need PyMuPDF.
+# Plain text in stream order (no layout sort); ligatures come out as plain letters
+TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+def read_pages(doc, start, end):
+    return "".join(doc.load_page(i).get_text("text", sort=False, flags=TEXT_FLAGS) for i in range(start, end))
+
+def extract_pages(path, start, end):
+    # Runs in a worker process, so it reopens the document by path
+    with fitz.open(path) as doc:
+        return read_pages(doc, start, end)